@@ -0,0 +1,28 @@
+# SPDX-FileCopyrightText: 2025 Stefano Miccoli <stefano.miccoli@polimi.it>
+#
+# SPDX-License-Identifier: MIT
+
+"""optional numba acceleration
+
+numba is an optional dependency ('numba' extra): when it is not
+installed the decorated functions run as plain python.
+"""
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:
+
+    def njit(*args, **kwargs):  # type: ignore[misc]
+        """no-op stand-in for numba.njit"""
+
+        if args and callable(args[0]):
+            return args[0]
+
+        def wrap(func):
+            return func
+
+        return wrap
+
+    HAVE_NUMBA = False
@@ -4,18 +4,20 @@
 
 """high level interface"""
 
-import array
 import dataclasses
+import functools
 import itertools
 import logging
 import os
-from collections.abc import Iterator, Sequence
-from typing import Any
+import struct
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any, ClassVar
 
 import numpy as np
 import numpy.typing as npt
 
 from . import ftnfil
+from ._jit import HAVE_NUMBA, njit
 
 logging.captureWarnings(True)
 logger = logging.getLogger(__name__)
@@ -33,14 +35,67 @@ class StepDataBlockElement(StepDataBlock):
     data: np.ndarray
 
 
-def _issorted(v: np.ndarray) -> np.bool:
-    """returns true if vector v is sorted"""
-    return np.all(v[:-1] <= v[1:])
+@dataclasses.dataclass
+class _StepBlock:
+    """cached descriptor of one output data block within a step
+
+    'dtype' is None for blocks with an unimplemented output flag, which
+    carry no decoded data
+    """
+
+    flag: int
+    set: bytes
+    eltype: bytes | None = None
+    s_pos: int = 0
+    e_pos: int = 0
+    dtype: np.dtype | None = None
+
+
+if HAVE_NUMBA:
+    # compiled kernels: single pass, no temporaries, and an early exit
+    # on the first out-of-order pair
+
+    @njit(cache=True)
+    def _issorted(v: np.ndarray) -> bool:
+        """returns true if vector v is sorted"""
+        for i in range(v.shape[0] - 1):  # noqa: SIM110 -- numba kernel
+            if v[i] > v[i + 1]:
+                return False
+        return True
+
+    @njit(cache=True)
+    def _issorted_strict(v: np.ndarray) -> bool:
+        """returns true if vector v is sorted with no repetitions"""
+        for i in range(v.shape[0] - 1):  # noqa: SIM110 -- numba kernel
+            if v[i] >= v[i + 1]:
+                return False
+        return True
 
+else:
 
-def _issorted_strict(v: np.ndarray) -> np.bool:
-    """returns true if vector v is sorted with no repetitions"""
-    return np.all(v[:-1] < v[1:])
+    def _issorted(v: np.ndarray) -> bool:
+        """returns true if vector v is sorted"""
+        return bool(np.all(v[:-1] <= v[1:]))
+
+    def _issorted_strict(v: np.ndarray) -> bool:
+        """returns true if vector v is sorted with no repetitions"""
+        return bool(np.all(v[:-1] < v[1:]))
+
+
+def _fuse(parts: Sequence[np.ndarray]) -> np.ndarray:
+    """concatenate 'parts' into a single preallocated array
+
+    a lone component is returned as is, without copying
+    """
+
+    if len(parts) == 1:
+        return parts[0]
+    out = np.empty(sum(len(a) for a in parts), dtype=parts[0].dtype)
+    off = 0
+    for a in parts:
+        out[off : off + len(a)] = a
+        off += len(a)
+    return out
 
 
 def _pad(x: int) -> int:
@@ -48,7 +103,10 @@ def _pad(x: int) -> int:
     return x + (-x % ftnfil.AWL)
 
 
-def _abq_dtype(items: Sequence[tuple[str, str | tuple[str, int]]]) -> np.dtype:
+@functools.lru_cache
+def _abq_dtype(
+    items: tuple[tuple[str, str | tuple[str, int]], ...],
+) -> np.dtype:
     """make abaqus dtype"""
 
     if not items:
@@ -69,6 +127,7 @@ def _abq_dtype(items: Sequence[tuple[str, str | tuple[str, int]]]) -> np.dtype:
     )
 
 
+@functools.lru_cache
 def _record_dtype(rtyp: int, rlen: int) -> np.dtype:
     """return numpy dtype for Abaqus records"""
 
@@ -138,11 +197,131 @@ def _record_dtype(rtyp: int, rlen: int) -> np.dtype:
             msg = f"Unrecognized record: rtype = {rtyp}, rlen = {rlen}"
             raise ValueError(msg)
 
-    dtype = _abq_dtype(items)
+    dtype = _abq_dtype(tuple(items))
     assert dtype.itemsize == (rlen - 2) * ftnfil.AWL, (rtyp, rlen)
     return dtype
 
 
+# struct codes for the scalar field kinds used by _record_dtype
+_STRUCT_CODE = {
+    ("i", 4): "i",
+    ("u", 4): "I",
+    ("i", 8): "q",
+    ("u", 8): "Q",
+    ("f", 8): "d",
+}
+
+
+@functools.lru_cache
+def _record_struct(rtyp: int, rlen: int) -> struct.Struct:
+    """return a struct decoder equivalent to _record_dtype(rtyp, rlen)
+
+    only records made of scalar and string fields are supported
+    """
+
+    dt = _record_dtype(rtyp, rlen)
+    assert dt.names is not None and dt.fields is not None
+    fmt = ["<"]
+    pos = 0
+    for name in dt.names:
+        fdt, off = dt.fields[name][:2]
+        assert fdt.subdtype is None, name
+        fmt.append("x" * (off - pos))
+        if fdt.kind == "S":
+            fmt.append(f"{fdt.itemsize:d}s")
+        else:
+            fmt.append(_STRUCT_CODE[fdt.kind, fdt.itemsize])
+        pos = off + fdt.itemsize
+    fmt.append("x" * (dt.itemsize - pos))
+    st = struct.Struct("".join(fmt))
+    assert st.size == dt.itemsize
+    return st
+
+
+def _decode_record(rtyp: int, rlen: int, rdat: np.ndarray) -> tuple:
+    """decode the data words of a single record into python values
+
+    equivalent to rdat.view(_record_dtype(rtyp, rlen)).item(), but a
+    plain struct.unpack instead of a dtype + ndarray wrap per record
+    """
+
+    return _record_struct(rtyp, rlen).unpack(rdat.tobytes())
+
+
+@functools.lru_cache
+def _facet_dtype(rlen: int) -> np.dtype:
+    """return numpy dtype for a 1502 surface facet record
+
+    1502 format
+    Record key: 1502(S)   Record type: Surface facet
+    Attributes:   1  -  Underlying element number.
+                  2  -  Element face key
+                        (1-S1, 2-S2, 3-S3, 4-S4, 5-S5, 6-S6,
+                         7-SPOS, 8-SNEG).
+                  3  -  Number of nodes in facet.
+                  4  -  Node number of the facet's first node.
+                  5  -  Node number of the facet's second node.
+                  6  -  Etc.
+    """
+
+    # attribute 3 is redundant and not read, skipped with offset
+    assert rlen - 3 - 2 > 0
+    return np.dtype(
+        {
+            "names": ["elnum", "f_id", "nodes"],
+            "formats": ["i4", "i8", f"({rlen - 3 - 2:d},)i8"],
+            "itemsize": 8 * (rlen - 2),
+            "offsets": [0, 8, 24],
+        }
+    )
+
+
+@functools.lru_cache
+def _step_block_dtype(types: tuple[tuple[int, int, int], ...]) -> np.dtype:
+    """return numpy dtype for one row of an element output block
+
+    'types' holds a (rkey, word offset, data length) entry per output
+    record of the row, plus a (-1, row length, 0) sentinel
+    """
+
+    # construct dtype for this output block
+    # record key: 1
+    dtdict: dict[str, Any] = {
+        "names": [
+            "num",
+            "ipnum",
+            "spnum",
+            "loc",
+            "rebarname",
+            "ndi",
+            "nshr",
+            "ndir",
+            "nsfc",
+        ],
+        "formats": [
+            "i4",
+            "i4",
+            "i4",
+            "i4",
+            "S8",
+            "i4",
+            "i4",
+            "i4",
+            "i4",
+        ],
+        "offsets": [16, 24, 32, 40, 48, 56, 64, 72, 80],
+    }
+    # data records
+    for k, o, s in types[:-1]:
+        dtdict["names"].append(f"R{k:d}")
+        dtdict["formats"].append(f"({s:d},)f8")
+        dtdict["offsets"].append((2 + o) * ftnfil.AWL)
+    # make dtype
+    dt = np.dtype(dtdict)  # type: ignore[call-overload]
+    assert dt.itemsize == ftnfil.AWL * types[-1][1]
+    return dt
+
+
 class AbqFil:
     @staticmethod
     def b2str(b: bytes) -> str:
@@ -156,59 +335,130 @@ class AbqFil:
             f" Abaqus ver. {self.b2str(self.info['ver'])}"
         )
 
-    def __init__(self, path: str | os.PathLike) -> None:
+    # factory functions for the file backing, see ftnfil
+    _loaders: ClassVar[dict[str, Callable]] = {
+        "mmap": ftnfil.mmfil,
+        "read": ftnfil.readfil,
+    }
+
+    @classmethod
+    def open_header_only(
+        cls, path: str | os.PathLike, *, loader: str = "mmap"
+    ) -> "AbqFil":
+        """open a .fil file for summary use only
+
+        sets, labels and surfaces are left unparsed (the corresponding
+        attributes are empty): much cheaper when only the model and
+        step summaries are needed, e.g. for batch inspection
+        """
+        return cls(path, header_only=True, loader=loader)
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        verify: bool = False,
+        loader: str = "mmap",
+        header_only: bool = False,
+    ) -> None:
         self.path = path
-        self.fil = ftnfil.mmfil(path)
+        # when 'verify' is set, expensive full-array invariant checks
+        # (sortedness, homogeneity) are run while decoding
+        self._verify = verify
+        try:
+            load = self._loaders[loader]
+        except KeyError:
+            msg = f"unknown loader: {loader!r}"
+            raise ValueError(msg) from None
+        self.fil = load(path)
 
         data = self.fil["data"]
-        stream = ftnfil.rstream(data)
-        pos, rtyp, rlen, rdat = next(stream)
+
+        # index all records in a single compiled pass; every section
+        # below walks the index arrays instead of a record stream
+        rec_pos, rec_typ, rec_len = ftnfil.scanrec(data)
+        self._rec_pos = rec_pos
+        self._rec_typ = rec_typ
+        self._rec_len = rec_len
+        nrec = len(rec_pos)
+
+        # record indices where a new homogeneous run (same record type
+        # and length) starts, for skipping whole runs at once
+        run_bnd = (
+            np.flatnonzero(
+                (rec_typ[1:] != rec_typ[:-1]) | (rec_len[1:] != rec_len[:-1])
+            )
+            + 1
+        )
+
+        def rec(i: int) -> tuple[int, int, int]:
+            """position, type and length of the i-th record"""
+            return int(rec_pos[i]), int(rec_typ[i]), int(rec_len[i])
+
+        def posof(i: int) -> int:
+            """word position of the i-th record (or end of data)"""
+            return int(rec_pos[i]) if i < nrec else data.size
+
+        def rdat(i: int) -> np.ndarray:
+            """data words of the i-th record"""
+            p, _, rl = rec(i)
+            return data.flat[p + 2 : p + rl]
+
+        def skiprun(i: int) -> int:
+            """index of the first record after the homogeneous run at i"""
+            k = np.searchsorted(run_bnd, i, side="right")
+            return int(run_bnd[k]) if k < len(run_bnd) else nrec
 
         # 1921: general info
+        pos, rtyp, rlen = rec(0)
         assert pos == 0 and rtyp == 1921, (pos, rtyp, rlen)
         logger.debug("Collect general info (%.2f)", pos / data.size)
-        self.info = rdat.view(_record_dtype(rtyp, rlen))[0]
-        pos, rtyp, rlen, rdat = next(stream)
+        self.info = rdat(0).view(_record_dtype(rtyp, rlen))[0]
+        i = 1
 
         # 1900, 1990: build element incidences
-        assert rtyp == 1900, (pos, rtyp, rlen)
-        logger.debug("Collect elm data (%.2f)", pos / data.size)
+        assert rec_typ[i] == 1900, rec(i)
+        logger.debug("Collect elm data (%.2f)", rec_pos[i] / data.size)
         elm: dict[bytes, list[np.ndarray]] = {}
-        while rtyp == 1900:
-            s_pos, s_rtyp, s_rlen = pos, rtyp, rlen
-            pos, rtyp, rlen, rdat = stream.send(())
-            mesh = ftnfil.datablock(data, s_pos, pos, s_rlen).view(
+        while rec_typ[i] == 1900:
+            s_pos, s_rtyp, s_rlen = rec(i)
+            i = skiprun(i)
+            mesh = ftnfil.datablock(data, s_pos, posof(i), s_rlen).view(
                 _record_dtype(s_rtyp, s_rlen)
             )
             # usually len(np.unique(mesh["eltyp"]) == 1, but sometimes
             # we have consecutive element blocks with the same number
-            # of nodes, i.e. same rlen.
-            for eltyp in np.unique(mesh["eltyp"]):
-                mesh_comp = mesh[mesh["eltyp"] == eltyp]
-                assert _issorted_strict(mesh_comp["elnum"])
+            # of nodes, i.e. same rlen: group with one stable sort
+            # instead of one boolean-mask pass per element type
+            order = np.argsort(mesh["eltyp"], kind="stable")
+            types, starts = np.unique(mesh["eltyp"][order], return_index=True)
+            ends = np.append(starts[1:], len(mesh))
+            for eltyp, s, e in zip(types, starts, ends, strict=True):
+                mesh_comp = mesh if len(types) == 1 else mesh[order[s:e]]
+                if verify:
+                    assert _issorted_strict(mesh_comp["elnum"])
                 elm.setdefault(eltyp, []).append(mesh_comp)
 
             ## FIXME: 1990 record handling not tested!
-            while rtyp == 1990:  # continuation record
+            while rec_typ[i] == 1990:  # continuation record
                 assert len(elm[eltyp][-1]) == 1
                 elnum, _, ninc = elm[eltyp][-1][0]
                 assert _ == eltyp
-                ninc = np.append(ninc, rdat.view("i8"))
+                ninc = np.append(ninc, rdat(i).view("i8"))
                 elm[eltyp][-1] = np.array(
                     [(elnum, eltyp, ninc)],
                     dtype=_record_dtype(1900, len(ninc) + 2),
                 )
-                pos, rtyp, rlen, rdat = next(stream)
+                i += 1
 
         # fuse all homogeneous mesh components
-        self.elm: list[np.ndarray] = [
-            np.concat(elm.pop(eltyp)) for eltyp in list(elm)
-        ]
-        assert elm == {}
+        self.elm: list[np.ndarray] = [_fuse(v) for v in elm.values()]
+        del elm
         nelm_total = 0
         for v in self.elm:
-            assert np.all(v["eltyp"] == v["eltyp"][0])
-            assert _issorted_strict(v["elnum"])
+            if verify:
+                assert np.all(v["eltyp"] == v["eltyp"][0])
+                assert _issorted_strict(v["elnum"])
             nelm_total += len(v)
             if np.any(v["elnum"] - v["elnum"][0] != np.arange(len(v))):
                 logger.warning(
@@ -218,140 +468,159 @@ class AbqFil:
         assert nelm_total == self.info["nelm"]
 
         # 1901: build nodal coordinates
-        logger.debug("Collect node data (%.2f)", pos / data.size)
-        assert rtyp == 1901, (pos, rtyp, rlen)
-        s_pos, s_rtyp, s_rlen = pos, rtyp, rlen
-        pos, rtyp, rlen, rdat = stream.send(())
+        logger.debug("Collect node data (%.2f)", rec_pos[i] / data.size)
+        assert rec_typ[i] == 1901, rec(i)
+        s_pos, s_rtyp, s_rlen = rec(i)
+        i = skiprun(i)
         self.coord: np.ndarray = ftnfil.datablock(
-            data, s_pos, pos, s_rlen
+            data, s_pos, posof(i), s_rlen
         ).view(_record_dtype(s_rtyp, s_rlen))
-        assert _issorted_strict(self.coord["nnum"])
+        if verify:
+            assert _issorted_strict(self.coord["nnum"])
         assert len(self.coord) == self.info["nnod"]
 
-        # 1933, 1934: element sets
-        logger.debug("Collect elset data (%.2f)", pos / data.size)
-        self.elset: dict[bytes, npt.NDArray[np.int32]] = {}
-        while rtyp == 1933:
-            elset_label = bytes(rdat[0])
-            elset_array = array.array("I", rdat[1:].view("=2u4")[..., 0])
-            pos, rtyp, rlen, rdat = next(stream)
-
-            while rtyp == 1934:
-                elset_array.extend(rdat.view("=2u4")[..., 0])
-                pos, rtyp, rlen, rdat = next(stream)
-
-            self.elset[elset_label] = np.array(elset_array)
-            assert _issorted_strict(self.elset[elset_label])
+        def setids(i: int, cont: int) -> tuple[npt.NDArray[np.uint32], int]:
+            """collect the ids of the set whose header is record i
+
+            'cont' is the type of the continuation records; returns the
+            ids and the index of the first record after the set
+            """
+            head = rdat(i)[1:].view("=2u4")[..., 0]
+            # runs of equal-length continuation records
+            runs = []
+            j = i + 1
+            while rec_typ[j] == cont:
+                k, j = j, skiprun(j)
+                runs.append((k, j))
+            # one id per data word, preallocate and fill in place
+            n = len(head) + int(rec_len[i + 1 : j].sum()) - 2 * (j - i - 1)
+            ids = np.empty(n, dtype="=u4")
+            ids[: len(head)] = head
+            off = len(head)
+            # ids are the low u4 word of each data word: gather every
+            # run with a single strided view on the mmap
+            for k0, k1 in runs:
+                chunk = ftnfil.datablock(
+                    data, posof(k0), posof(k1), int(rec_len[k0])
+                )
+                chunk = chunk.view("=u4").reshape(-1, 2)[:, 0]
+                ids[off : off + len(chunk)] = chunk
+                off += len(chunk)
+            assert off == n
+            return ids, j
 
-        # 1931, 1932: node sets
-        logger.debug("Collect nset data (%.2f)", pos / data.size)
+        self.elset: dict[bytes, npt.NDArray[np.int32]] = {}
         self.nset: dict[bytes, npt.NDArray[np.int32]] = {}
-        while rtyp == 1931:
-            nset_label = bytes(rdat[0])
-            nset_array = array.array("I", rdat[1:].view("=2u4")[..., 0])
-            pos, rtyp, rlen, rdat = next(stream)
-
-            while rtyp == 1932:
-                nset_array.extend(rdat.view("=2u4")[..., 0])
-                pos, rtyp, rlen, rdat = next(stream)
-
-            self.nset[nset_label] = np.array(nset_array)
-
-        # 1940: label cross reference
         self.label: dict[bytes, bytes] = {}
-        while rtyp == 1940:
-            k, v = rdat.view(_record_dtype(rtyp, rlen)).item()
-            k = f"{k:8d}".encode("ASCII")
-            self.label[k] = v
-            pos, rtyp, rlen, rdat = next(stream)
-
-        # 1902: active degrees of freedom
-        assert rtyp == 1902, (pos, rtyp, rlen)
-        self.dof: npt.NDArray[np.int32] = rdat.view("=2u4")[..., 0]
-        pos, rtyp, rlen, rdat = next(stream)
-
-        # 1922: heading
-        assert rtyp == 1922, (pos, rtyp, rlen)
-        self.heading: bytes = bytes(rdat)
-        pos, rtyp, rlen, rdat = next(stream)
-
-        # 2001: padding
-        if rtyp == 2001:
-            pos, rtyp, rlen, rdat = next(stream)
-        assert pos % ftnfil.AWR == 0
-
-        # 1501, 1502: surfaces
-        logger.debug("Collect surf data (%.2f)", pos / data.size)
         # TODO: refactor rsurf/dsurf type (named tuple?)
         self.rsurf: dict[bytes, Any] = {}
         self.dsurf: dict[bytes, Any] = {}
-        while rtyp == 1501:
-            surf = {}
-            name, surf["sdim"], stype, nfacet, nmaster, *masters = rdat.view(
-                _record_dtype(rtyp, rlen)
-            ).item()
-            assert 1 <= surf["sdim"] <= 4
-            assert 1 <= stype <= 2
-            if stype == 1:  # deformable
-                self.dsurf[name] = surf
-                surf["msurf"] = masters
-                # for deformable surfaces 'nmaster' is the number of associated
-                # master surfaces
-                assert rlen == 2 + 5 + nmaster
-                assert len(surf["msurf"]) == nmaster
-            elif stype == 2:  # rigid
-                self.rsurf[name] = surf
-                # for rigid surfaces 'nmaster' is the reference node label
-                surf["reference_node"] = nmaster
-                assert rlen == 2 + 5
-                assert len(masters) == 0, f"unexpected masters: {masters}"
-            else:
-                assert False, f"unrecognized surface type {stype}"
-            pos, rtyp, rlen, rdat = next(stream)
-
-            surf["facet_block"] = []
-            assert rtyp == 1502
-            while rtyp == 1502:
-                s_pos, s_rtyp, s_rlen = pos, rtyp, rlen
-                pos, rtyp, rlen, rdat = stream.send(())
-
-                # 1502 format
-                # Record key: 1502(S)   Record type: Surface facet
-                # Attributes:   1  -  Underlying element number.
-                #               2  -  Element face key
-                #                     (1-S1, 2-S2, 3-S3, 4-S4, 5-S5, 6-S6,
-                #                      7-SPOS, 8-SNEG).
-                #               3  -  Number of nodes in facet.
-                #               4  -  Node number of the facet's first node.
-                #               5  -  Node number of the facet's second node.
-                #               6  -  Etc.
-
-                # attribute 3 is redundant and not read, skipped with offset
-                assert s_rlen - 3 - 2 > 0
-                dt = np.dtype(
-                    {
-                        "names": ["elnum", "f_id", "nodes"],
-                        "formats": ["i4", "i8", f"({s_rlen - 3 - 2:d},)i8"],
-                        "itemsize": 8 * (s_rlen - 2),
-                        "offsets": [0, 8, 24],
-                    }
+
+        if header_only:
+            # summary use only: locate the dof and heading records by
+            # type and jump straight to the step data, leaving sets,
+            # labels and surfaces unparsed
+            k = int(np.flatnonzero(rec_typ == 1902)[0])
+            self.dof: npt.NDArray[np.int32] = rdat(k).view("=2u4")[..., 0]
+            k = int(np.flatnonzero(rec_typ == 1922)[0])
+            self.heading: bytes = bytes(rdat(k))
+            i = int(np.flatnonzero((rec_typ == 2000) & (rec_len == 23))[0])
+        else:
+            # 1933, 1934: element sets
+            logger.debug("Collect elset data (%.2f)", rec_pos[i] / data.size)
+            while rec_typ[i] == 1933:
+                elset_label = bytes(rdat(i)[0])
+                self.elset[elset_label], i = setids(i, 1934)
+                if verify:
+                    assert _issorted_strict(self.elset[elset_label])
+
+            # 1931, 1932: node sets
+            logger.debug("Collect nset data (%.2f)", rec_pos[i] / data.size)
+            while rec_typ[i] == 1931:
+                nset_label = bytes(rdat(i)[0])
+                self.nset[nset_label], i = setids(i, 1932)
+
+            # 1940: label cross reference
+            while rec_typ[i] == 1940:
+                # decode a whole run of equal-length records in one view
+                s_pos, s_rtyp, s_rlen = rec(i)
+                i = skiprun(i)
+                lbl = ftnfil.datablock(data, s_pos, posof(i), s_rlen).view(
+                    _record_dtype(s_rtyp, s_rlen)
                 )
-                surf["facet_block"].append(
-                    ftnfil.datablock(data, s_pos, pos, s_rlen).view(dt)
+                self.label.update(
+                    (f"{k:8d}".encode("ASCII"), v)
+                    for k, v in zip(
+                        lbl["key"].tolist(), lbl["label"].tolist(), strict=True
+                    )
                 )
-            if __debug__:
-                tfacet = 0
-                for f in surf["facet_block"]:
-                    assert _issorted(f["elnum"])
-                    tfacet += len(f)
-            assert tfacet == nfacet, (tfacet, nfacet)
-
-        # 2001: padding
-        if rtyp == 2001:
-            pos, rtyp, rlen, rdat = next(stream)
-        assert pos % ftnfil.AWR == 0
+
+            # 1902: active degrees of freedom
+            assert rec_typ[i] == 1902, rec(i)
+            self.dof = rdat(i).view("=2u4")[..., 0]
+            i += 1
+
+            # 1922: heading
+            assert rec_typ[i] == 1922, rec(i)
+            self.heading = bytes(rdat(i))
+            i += 1
+
+            # 2001: padding
+            if rec_typ[i] == 2001:
+                i += 1
+            assert rec_pos[i] % ftnfil.AWR == 0
+
+            # 1501, 1502: surfaces
+            logger.debug("Collect surf data (%.2f)", rec_pos[i] / data.size)
+            while rec_typ[i] == 1501:
+                _, rtyp, rlen = rec(i)
+                surf = {}
+                name, surf["sdim"], stype, nfacet, nmaster, *masters = (
+                    _decode_record(rtyp, rlen, rdat(i))
+                )
+                assert 1 <= surf["sdim"] <= 4
+                assert 1 <= stype <= 2
+                if stype == 1:  # deformable
+                    self.dsurf[name] = surf
+                    surf["msurf"] = masters
+                    # for deformable surfaces 'nmaster' is the number of
+                    # associated master surfaces
+                    assert rlen == 2 + 5 + nmaster
+                    assert len(surf["msurf"]) == nmaster
+                elif stype == 2:  # rigid
+                    self.rsurf[name] = surf
+                    # for rigid surfaces 'nmaster' is the reference node
+                    # label
+                    surf["reference_node"] = nmaster
+                    assert rlen == 2 + 5
+                    assert len(masters) == 0, f"unexpected masters: {masters}"
+                else:
+                    assert False, f"unrecognized surface type {stype}"
+                i += 1
+
+                surf["facet_block"] = []
+                assert rec_typ[i] == 1502
+                while rec_typ[i] == 1502:
+                    s_pos, s_rtyp, s_rlen = rec(i)
+                    i = skiprun(i)
+                    surf["facet_block"].append(
+                        ftnfil.datablock(data, s_pos, posof(i), s_rlen).view(
+                            _facet_dtype(s_rlen)
+                        )
+                    )
+                if verify:
+                    for f in surf["facet_block"]:
+                        assert _issorted(f["elnum"])
+                tfacet = sum(len(f) for f in surf["facet_block"])
+                assert tfacet == nfacet, (tfacet, nfacet)
+
+            # 2001: padding
+            if rec_typ[i] == 2001:
+                i += 1
+            assert rec_pos[i] % ftnfil.AWR == 0
 
         # hic sunt step data
+        pos, rtyp, rlen = rec(i)
         logger.debug("Collect step data (%.2f)", pos / data.size)
         assert (rtyp, rlen) == (2000, 23)
         dtype2000 = _record_dtype(2000, 23)
@@ -363,6 +632,17 @@ class AbqFil:
         assert len(self.step) == len(step_ptr) - 1
 
         self._step_ptr = step_ptr
+
+        # indices of the records that terminate an output data block
+        # (1911 or 2001), used when parsing the step data blocks
+        self._out_rec: npt.NDArray[np.int64] = np.flatnonzero(
+            (rec_typ == 1911) | (rec_typ == 2001)
+        )
+
+        # per-step cache of output data block descriptors, filled
+        # lazily by get_step
+        self._step_blocks: dict[int, list[_StepBlock]] = {}
+
         logger.debug("Found %d steps", len(self.step))
         for i in range(len(self.step)):
             logger.debug(
@@ -372,10 +652,50 @@ class AbqFil:
                 step_ptr[i + 1] / len(data),
             )
 
+    def _next_out_rec(self, i: int) -> int:
+        """index of the first 1911/2001 record after record 'i'"""
+        k = np.searchsorted(self._out_rec, i, side="right")
+        return int(self._out_rec[k])
+
     def get_step(self, istep: int) -> Iterator[StepDataBlock]:
         """get step data"""
 
         logger.debug("Collect step %d", istep)
+        try:
+            blocks = self._step_blocks[istep]
+        except KeyError:
+            blocks = self._step_blocks[istep] = self._parse_step(istep)
+
+        data = self.fil["data"]
+        for blk in blocks:
+            if blk.dtype is None:
+                yield StepDataBlock(flag=blk.flag, set=blk.set)
+                continue
+
+            r = data.flat[blk.s_pos : blk.e_pos].view(blk.dtype)
+            if self._verify:
+                assert _issorted(r["num"])
+                for k in ["loc", "ndi", "nshr", "ndir", "nsfc"]:
+                    assert np.all(r[k] == r[k][0]), f"inhomogeneous {k}"
+            logger.debug(
+                "data block: %s",
+                list(
+                    zip(
+                        ["loc", "ndi", "nshr", "ndir", "nsfc"],
+                        r[["loc", "ndi", "nshr", "ndir", "nsfc"]][0].item(),
+                        strict=True,
+                    )
+                ),
+            )
+            yield StepDataBlockElement(
+                flag=blk.flag, set=blk.set, eltype=blk.eltype, data=r
+            )
+
+    def _parse_step(self, istep: int) -> list[_StepBlock]:
+        """parse the output data blocks of step 'istep'
+
+        called once per step by get_step, which caches the descriptors
+        """
 
         # record keys
         # 2000 - inc start
@@ -385,49 +705,48 @@ class AbqFil:
         # <end>
         # 2001 - inc stop/padding
 
-        data = self.fil["data"][
-            self._step_ptr[istep] : self._step_ptr[istep + 1]
-        ]
-        stream = ftnfil.rstream(data)
-        pos, rtyp, rlen, _ = next(stream)
+        rec_pos, rec_typ, rec_len = self._rec_pos, self._rec_typ, self._rec_len
+        data = self.fil["data"]
+
+        base = self._step_ptr[istep] * ftnfil.AWR
+        stop = self._step_ptr[istep + 1] * ftnfil.AWR
+        logger.debug("Step data: %.1f MiB", (stop - base) * ftnfil.AWL / 2**20)
+        i = int(np.searchsorted(rec_pos, base))
+        iend = int(np.searchsorted(rec_pos, stop))
 
         # skip first 2000 record
-        assert (rtyp, rlen) == (2000, 23), (rtyp, rlen)
-        pos, rtyp, rlen, rdat = next(stream)
+        assert (rec_typ[i], rec_len[i]) == (2000, 23), (rec_typ[i], rec_len[i])
+        i += 1
 
-        logger.debug("Step data: %.1f MiB", data.nbytes / 1024**2)
         # iterate over 1911 records
-        while True:
-            if rtyp == 2001:
-                break
-
-            assert rtyp == 1911, (rtyp, rlen)
-            r1911 = rdat.view(_record_dtype(rtyp, rlen))
-            flag, outset, *_ = r1911.item()
+        blocks: list[_StepBlock] = []
+        while i < iend and rec_typ[i] != 2001:
+            assert rec_typ[i] == 1911, (rec_typ[i], rec_len[i])
+            p, rl = int(rec_pos[i]), int(rec_len[i])
+            r1911 = _decode_record(1911, rl, data.flat[p + 2 : p + rl])
+            flag, outset, *_ = r1911
 
             if flag == 0:
-                (pos, rtyp, rlen, rdat), step_data = self._flag0(
-                    r1911=r1911, data=data, stream=stream
-                )
+                blk, i = self._flag0(r1911, i)
             else:
                 logger.error("Not implemented: element output flag %d", flag)
                 # skip to end of data block
-                pos, rtyp, rlen, rdat = stream.send((1911, 2001))
-                step_data = StepDataBlock(flag=flag, set=outset)
+                i = self._next_out_rec(i)
+                blk = _StepBlock(flag=flag, set=outset)
+            logger.debug(
+                "Step output request done (%.2f)", rec_pos[i] / data.size
+            )
+            if blk is not None:
+                blocks.append(blk)
 
-            logger.debug("Step output request done (%.2f)", pos / data.size)
-            if step_data is not None:
-                yield step_data
+        return blocks
 
-        return
+    def _flag0(self, r1911: tuple, i: int) -> tuple[_StepBlock | None, int]:
+        """parse an element output block; record 'i' is its 1911 header
 
-    def _flag0(
-        self, *, r1911: npt.NDArray, data: Any, stream: Any
-    ) -> tuple[
-        tuple[np.uint32, np.uint32, np.uint32, npt.NDArray],
-        StepDataBlock | None,
-    ]:
-        """read element output"""
+        returns the block descriptor (None for an empty block) and the
+        index of the 1911/2001 record that terminates the block
+        """
 
         # <repeat (0 or more times)>
         #   1 - element header
@@ -436,7 +755,9 @@ class AbqFil:
         #   ...
         # <end>
 
-        flag, outset, outelm = r1911.item()
+        rec_pos, rec_typ, rec_len = self._rec_pos, self._rec_typ, self._rec_len
+
+        flag, outset, outelm = r1911
         assert flag == 0
 
         logger.debug(
@@ -445,12 +766,14 @@ class AbqFil:
             self.b2str(outelm),
         )
 
-        pos, rtyp, rlen, rdat = next(stream)
-        if rtyp == 1911 or rtyp == 2001:
+        j = self._next_out_rec(i)
+        if j == i + 1:
             logger.debug("data block: empty")
-            return (pos, rtyp, rlen, rdat), None
+            return None, j
 
-        assert rtyp == 1, rtyp
+        s = i + 1
+        assert rec_typ[s] == 1, rec_typ[s]
+        s_pos = int(rec_pos[s])
 
         # iterate over "columns" of first "row"
         # meta-data of colums is stored in 'types':
@@ -459,80 +782,27 @@ class AbqFil:
         # where header is (rlen, rkey) thus of length 2
 
         types = []
-        s_pos = pos
-        while True:
-            pos, rtyp, rlen, rdat = next(stream)
-            if rtyp == 1:
-                break
-            types.append((rtyp, pos - s_pos, rlen - 2))
-        types.append((-1, pos - s_pos, 0))  # sentinel
+        t = s + 1
+        while t < j and rec_typ[t] != 1:
+            types.append(
+                (int(rec_typ[t]), int(rec_pos[t]) - s_pos, int(rec_len[t]) - 2)
+            )
+            t += 1
+        types.append((-1, int(rec_pos[t]) - s_pos, 0))  # sentinel
         assert types[0][1] == 11  # lenght of rkey 1
-        assert types[-1][1] == pos - s_pos  # output request length
-
-        # construct dtype for this output block
-        # record key: 1
-        dtdict: dict[str, Any] = {
-            "names": [
-                "num",
-                "ipnum",
-                "spnum",
-                "loc",
-                "rebarname",
-                "ndi",
-                "nshr",
-                "ndir",
-                "nsfc",
-            ],
-            "formats": [
-                "i4",
-                "i4",
-                "i4",
-                "i4",
-                "S8",
-                "i4",
-                "i4",
-                "i4",
-                "i4",
-            ],
-            "offsets": [16, 24, 32, 40, 48, 56, 64, 72, 80],
-        }
-        # data records
-        for k, o, s in types[:-1]:
-            dtdict["names"].append(f"R{k:d}")
-            dtdict["formats"].append(f"({s:d},)f8")
-            dtdict["offsets"].append((2 + o) * ftnfil.AWL)
-        # make dtype
-        dt = np.dtype(dtdict)  # type: ignore[call-overload]
-        assert dt.itemsize == ftnfil.AWL * (pos - s_pos)
-        logger.debug("data block: %s", dt.names)
-
-        # skip to last data record
-        ## FIXME: most of decoding time is spent here!
-        logger.debug("data block: iterating to find end record")
-        pos, rtyp, rlen, rdat = stream.send((1911, 2001))
+        assert types[-1][1] == int(rec_pos[t]) - s_pos  # output request length
 
-        # get data
-        logger.debug("data block: getting data")
-        r = data.flat[s_pos:pos].view(dt)
-
-        assert _issorted(r["num"])
-        if __debug__:
-            for k in ["loc", "ndi", "nshr", "ndir", "nsfc"]:
-                assert np.all(r[k] == r[k][0]), f"inhomogeneous {k}"
-        logger.debug(
-            "data block: %s",
-            list(
-                zip(
-                    ["loc", "ndi", "nshr", "ndir", "nsfc"],
-                    r[["loc", "ndi", "nshr", "ndir", "nsfc"]][0].item(),
-                    strict=True,
-                )
-            ),
-        )
+        # the same output request schema typically repeats across
+        # steps, so the dtype construction is cached
+        dt = _step_block_dtype(tuple(types))
+        logger.debug("data block: %s", dt.names)
 
-        _ret = (
-            (pos, rtyp, rlen, rdat),
-            StepDataBlockElement(flag=flag, set=outset, eltype=outelm, data=r),
+        blk = _StepBlock(
+            flag=flag,
+            set=outset,
+            eltype=outelm,
+            s_pos=s_pos,
+            e_pos=int(rec_pos[j]),
+            dtype=dt,
         )
-
-        return _ret
+        return blk, j
@@ -2,22 +2,255 @@
 #
 # SPDX-License-Identifier: MIT
 
+from __future__ import annotations
+
 import argparse
+import functools
+import hashlib
+import json
+import os
 import sys
-from typing import Any
-
-try:
-    import yaml
-except ImportError:
-    print(
-        "'filinfo' command requires the optional dependency 'filinfo'",
-        file=sys.stderr,
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from suanpan.abqfil import AbqFil
+
+# yaml and suanpan.abqfil (which pulls in numpy) dominate the CLI cold
+# start: they are imported lazily by _import_yaml() below and inside
+# _process(), so that --help, usage errors and --json runs do not pay
+# for what they never use
+yaml: Any = None
+_Dumper: Any = None
+
+
+def _import_yaml() -> None:
+    """import yaml and set up the shared dumper class on first use"""
+
+    global yaml, _Dumper
+    if yaml is not None:
+        return
+
+    try:
+        import yaml
+    except ImportError:
+        print(
+            "'filinfo' command requires the optional dependency 'filinfo'",
+            file=sys.stderr,
+        )
+        sys.exit(2)
+
+    try:
+        # libyaml-backed emitter, much faster than the pure-python one
+        base: type = yaml.CSafeDumper
+    except AttributeError:
+        base = yaml.SafeDumper
+        print(
+            "libyaml not available, falling back to the python emitter",
+            file=sys.stderr,
+        )
+
+    class _YamlDumper(base):  # type: ignore[misc, valid-type]
+        """dumper class shared by every emitted document
+
+        custom representers are registered once on this class, instead
+        of being re-attached to the stock dumper for each dump call
+        """
+
+    _YamlDumper.add_representer(
+        _Flow,
+        lambda dumper, data: dumper.represent_sequence(
+            "tag:yaml.org,2002:seq", data, flow_style=True
+        ),
     )
-    sys.exit(2)
 
-from suanpan.abqfil import AbqFil, StepDataBlock, StepDataBlockElement
+    _Dumper = _YamlDumper
+
+
+class _Flow(list):
+    """marker for lists to be emitted in yaml flow style
+
+    long lists of short scalars (the per-block 'records' names) are
+    much cheaper to emit -- and to read -- as '[R1, R2, ...]'
+    one-liners than as one block-style line per item
+    """
+
+
+# element types and set labels repeat across blocks and frames: decode
+# each unique bytes value only once
+@functools.lru_cache(maxsize=4096)
+def _b2str(b: bytes) -> str:
+    from suanpan.abqfil import AbqFil
+
+    return AbqFil.b2str(b)
+
+
+@functools.lru_cache(maxsize=256)
+def _record_names(names: tuple[str, ...]) -> list[str]:
+    """'R*' record fields of a data-block dtype
+
+    data-block dtypes are fully determined by element type and output
+    location, so the filtered list is computed once per unique dtype;
+    callers must copy the result before mutating or serializing it
+    (the yaml emitter would alias repeated objects)
+    """
+    return [n for n in names if n.startswith("R")]
+
+
+def _cache_path(pth: str, *, verbose: bool, as_json: bool) -> Path | None:
+    """cache file holding the rendered summary of 'pth', or None
+
+    the summary is fully determined by the file content and the output
+    flags, so the cache is keyed on (absolute path, mtime, size, flags)
+    """
+
+    try:
+        st = os.stat(pth)
+    except OSError:
+        return None
+    key = hashlib.blake2b(
+        f"{os.path.abspath(pth)}|{st.st_mtime_ns}|{st.st_size}"
+        f"|{verbose}|{as_json}".encode(),
+        digest_size=16,
+    ).hexdigest()
+    base = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser()
+    return base / "suanpan" / "filinfo" / key
 
-b2str = AbqFil.b2str
+
+def _verbose_data(
+    abq: AbqFil, istep: int, setname: dict[bytes, str | None]
+) -> list[dict[str, Any]]:
+    """per-block details of one frame, for the verbose summary
+
+    this is the hottest CLI loop (one dict per data block): locals are
+    bound outside the loop so the interpreter does not re-resolve the
+    globals and attribute chains on every block; 'setname' maps set
+    keys to their decoded display name and is shared across frames
+    """
+
+    from suanpan.abqfil import StepDataBlockElement
+
+    data: list[dict[str, Any]] = []
+    append = data.append
+    for db in abq.get_step(istep):
+        try:
+            name = setname[db.set]
+        except KeyError:
+            # unlabelled set: decode the raw key once and remember it
+            name = setname[db.set] = _b2str(db.set) or None
+        db_info: dict[str, Any] = {
+            "flag": db.flag,
+            "set": name,
+        }
+        if db.flag == 0 and isinstance(db, StepDataBlockElement):
+            db_info["eltype"] = _b2str(db.eltype)
+            db_info["location"] = db.data["loc"][0].item()
+            db_info["records"] = _Flow(_record_names(db.data.dtype.names))
+        append(db_info)
+    return data
+
+
+def _process(
+    pth: str, *, verbose: bool, as_json: bool, use_cache: bool = False
+) -> tuple[bytes, str]:
+    """summarize a single .fil file
+
+    returns a '(document, error)' pair so that the function can run in
+    a worker process: exactly one of the two is non-empty, and the
+    parent decides where each stream goes; the document is ascii bytes,
+    ready to be written to a binary stream
+    """
+
+    cpth = None
+    if use_cache:
+        cpth = _cache_path(pth, verbose=verbose, as_json=as_json)
+        if cpth is not None:
+            try:
+                return cpth.read_bytes(), ""
+            except OSError:
+                pass  # miss: render and fill the cache below
+
+    from suanpan.abqfil import AbqFil
+
+    b2str = AbqFil.b2str
+
+    try:
+        # the summary needs sets, labels and surfaces only in verbose
+        # mode: otherwise a header-only parse is enough
+        abq = AbqFil(pth) if verbose else AbqFil.open_header_only(pth)
+    except OSError as exc:
+        return b"", f"{exc}"
+    except ValueError as exc:
+        return b"", f"Invalid .fil file: {exc}"
+
+    elts = {_b2str(v["eltyp"][0]): len(v) for v in abq.elm}
+    elts["total"] = abq.info["nelm"].item()
+    info = {
+        "path": abq.path,
+        "version": b2str(abq.info["ver"]),
+        "date": f"{b2str(abq.info['date'])} {b2str(abq.info['time'])}",
+        "heading": b2str(abq.heading) or None,
+        "nodes": abq.info["nnod"].item(),
+        "elements": elts,
+        # convert whole columns at once: tolist() turns each column
+        # into native python objects in a single C loop, instead of
+        # going through the numpy scalar protocol row by row
+        "frames": [
+            {
+                "step": step,
+                "increment": incr,
+                "time": ttime,
+                "subheading": b2str(sub) or None,
+            }
+            for step, incr, ttime, sub in zip(
+                abq.step["step"].tolist(),
+                abq.step["incr"].tolist(),
+                abq.step["ttime"].tolist(),
+                abq.step["subheading"].tolist(),
+                strict=True,
+            )
+        ],
+    }
+
+    if verbose:
+        # resolve the (label lookup -> decode) chain once per set key,
+        # instead of once per data block
+        setname: dict[bytes, str | None] = {
+            k: b2str(v) or None for k, v in abq.label.items()
+        }
+        for i, frame_info in enumerate(info["frames"]):
+            frame_info["data"] = _verbose_data(abq, i, setname)
+
+    if as_json:
+        # json-lines fast path for machine consumers: the C
+        # serializer is several times faster than even libyaml
+        doc = json.dumps(info, separators=(",", ":")).encode() + b"\n"
+    else:
+        _import_yaml()
+        doc = yaml.dump(
+            info,
+            Dumper=_Dumper,
+            encoding="utf-8",
+            default_flow_style=False,
+            explicit_start=True,
+            explicit_end=False,
+            sort_keys=False,
+            allow_unicode=False,
+        )
+
+    if cpth is not None:
+        # best effort: a failed cache write must not fail the run;
+        # write-then-replace keeps concurrent readers consistent
+        try:
+            cpth.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cpth.with_name(f"{cpth.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(doc)
+            os.replace(tmp, cpth)
+        except OSError:
+            pass
+
+    return doc, ""
 
 
 def main() -> None:
@@ -27,73 +260,48 @@ def main() -> None:
     )
 
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="emit JSON instead of YAML (one document per line)",
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="reuse summaries cached from previous runs (default: on)",
+    )
     parser.add_argument("filename", nargs="*")
     args = parser.parse_args()
 
-    for pth in args.filename:
-        try:
-            abq = AbqFil(pth)
-        except OSError as exc:
-            print(f"{exc}", file=sys.stderr)
-            continue
-        except ValueError as exc:
-            print(f"Invalid .fil file: {exc}", file=sys.stderr)
-            continue
-
-        info = {
-            "path": abq.path,
-            "version": b2str(abq.info["ver"]),
-            "date": f"{b2str(abq.info['date'])} {b2str(abq.info['time'])}",
-            "heading": b2str(abq.heading) or None,
-            "nodes": abq.info["nnod"].item(),
-            "elements": {b2str(v["eltyp"][0]): len(v) for v in abq.elm}
-            | {"total": abq.info["nelm"].item()},
-            "frames": [
-                {
-                    "step": s["step"].item(),
-                    "increment": s["incr"].item(),
-                    "time": s["ttime"].item(),
-                    "subheading": b2str(s["subheading"]) or None,
-                }
-                for s in abq.step
-            ],
-        }
+    if not args.json:
+        # fail fast on a missing yaml dependency: this is the only
+        # place allowed to exit, before any file is parsed and before
+        # worker processes are spawned
+        _import_yaml()
 
-        if args.verbose:
-            for i, frame_info in enumerate(info["frames"]):
-                data = frame_info["data"] = []
-                for db in abq.get_step(i):
-                    db_info: dict[str, Any] = {
-                        "flag": db.flag,
-                        "set": b2str(abq.label.get(db.set, db.set)) or None,
-                    }
-                    match db:
-                        case StepDataBlock(flag=0):
-                            assert isinstance(db, StepDataBlockElement)
-                            db_info |= {
-                                "eltype": b2str(db.eltype),
-                                "location": db.data["loc"][0].item(),
-                                "records": [
-                                    r
-                                    for r in db.data.dtype.names
-                                    if r.startswith("R")
-                                ],
-                            }
-                        case _:
-                            pass
-                    data.append(db_info)
+    worker = functools.partial(
+        _process,
+        verbose=args.verbose,
+        as_json=args.json,
+        use_cache=args.cache,
+    )
+    if len(args.filename) > 1:
+        # files are independent: parse and render them concurrently,
+        # but emit the results in argument order
+        with ProcessPoolExecutor() as ex:
+            results = list(ex.map(worker, args.filename))
+    else:
+        results = [worker(pth) for pth in args.filename]
 
-        print(
-            yaml.safe_dump(
-                info,
-                default_flow_style=False,
-                explicit_start=True,
-                explicit_end=False,
-                sort_keys=False,
-                allow_unicode=False,
-            ),
-            end="",
-        )
+    for _, err in results:
+        if err:
+            print(err, file=sys.stderr)
+    # the documents are ascii bytes (allow_unicode=False): write them
+    # to the binary stream in one go, skipping the text-layer encode
+    # and folding the per-file write() calls into one
+    sys.stdout.buffer.writelines(doc for doc, _ in results)
+    sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":
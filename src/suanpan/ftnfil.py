@@ -10,6 +10,8 @@ import os
 
 import numpy as np
 
+from ._jit import njit
+
 ARECL = 4096  # fixed size of Abaqus records
 AWL = 8  # Abaqus word length
 AWR = ARECL // AWL  # Abaqus words per record
@@ -23,6 +25,24 @@ ABQ = np.dtype([("pad0", "=u4"), ("data", f"V{AWL}", AWR), ("pad1", "=u4")])
 assert ABQ.itemsize == ARECL + 8
 
 
+def _asabq(buf):
+    """wrap buffer 'buf' into a structured ndarray with ABQ dtype"""
+
+    if len(buf) % ABQ.itemsize:
+        msg = f"invalid file length, should be a multiple of {ABQ.itemsize:d}"
+        raise ValueError(msg)
+
+    arr = np.ndarray(shape=(len(buf) // ABQ.itemsize,), dtype=ABQ, buffer=buf)
+
+    # minimal sanity check
+    # check if first and last 10 records have correct pad data
+    if (arr["pad0"][:10] != ARECL).any() or (arr["pad1"][:10] != ARECL).any():
+        msg = "invalid file format: wrong pad data"
+        raise ValueError(msg)
+
+    return arr
+
+
 def mmfil(path):
     """factory function that creates a mmapped view of '.fil' file
 
@@ -38,19 +58,51 @@ def mmfil(path):
     mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
     os.close(fd)
 
-    if len(mm) % ABQ.itemsize:
-        msg = f"invalid file length, should be a multiple of {ABQ.itemsize:d}"
-        raise ValueError(msg)
+    # the file is decoded in a strictly sequential pass: advise the
+    # kernel so that pages are prefetched ahead of the scan instead of
+    # being faulted in one at a time (no-op where not supported)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    if hasattr(mmap, "MADV_WILLNEED"):
+        mm.madvise(mmap.MADV_WILLNEED)
 
-    arr = np.ndarray(shape=(len(mm) // ABQ.itemsize,), dtype=ABQ, buffer=mm)
+    return _asabq(mm)
 
-    # minimal sanity check
-    # check if first and last 10 records have correct pad data
-    if (arr["pad0"][:10] != ARECL).any() or (arr["pad1"][:10] != ARECL).any():
-        msg = "invalid file format: wrong pad data"
-        raise ValueError(msg)
 
-    return arr
+def readfil(path, chunk=16 * 1024 * 1024):
+    """factory function that reads a '.fil' file eagerly into memory
+
+    alternative to mmfil() for cold-cache opens of very large files:
+    the file is streamed into an anonymous map with large sequential
+    reads instead of being faulted in one page at a time
+
+    input arguments:
+    path -- path-like object pointing to the abaqus '.fil' file
+    chunk -- size of the read requests
+
+    output:
+    structured numpy ndarray with ABQ dtype holding the file content
+    """
+
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            msg = "empty file"
+            raise ValueError(msg)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+        mm = mmap.mmap(-1, size)
+        view = memoryview(mm)
+        off = 0
+        while off < size:
+            n = f.readinto(view[off : off + chunk])
+            if not n:
+                msg = "unexpected end of file"
+                raise ValueError(msg)
+            off += n
+
+    return _asabq(mm)
 
 
 def rstream(data, pos=0):
@@ -69,6 +121,12 @@ def rstream(data, pos=0):
         while True:
             data = df[pos + 2 : pos + rlen]
             skip = yield pos, rtyp, rlen, data
+            if isinstance(skip, int):
+                # jump to a known record boundary, e.g. obtained
+                # from a scanrec() index
+                pos = skip
+                rlen, rtyp = uf[pos : pos + 2]
+                continue
             pos += rlen
             if skip is not None:
                 if skip == ():
@@ -92,6 +150,58 @@ def rstream(data, pos=0):
         pass
 
 
+def scanrec(data, pos=0):
+    """index all records in 'data' starting at word position 'pos'
+
+    input arguments:
+    data -- 'V8' ndarray as returned by mmfil()['data']
+    pos -- word position of the first record to scan
+
+    output:
+    (rec_pos, rec_typ, rec_len) int64 arrays holding the word position,
+    record type and record length of every record from 'pos' to the end
+    """
+
+    if not isinstance(data, np.ndarray) or data.dtype != "V8":
+        msg = "'data' is not an array with 'V8' dtype"
+        raise TypeError(msg)
+
+    uf = np.atleast_2d(data.view("2u4")[..., 0])
+    rec_pos, rec_typ, rec_len, pos = _scanrec(uf, pos)
+    if pos != uf.size:
+        msg = "invalid or truncated record structure"
+        raise ValueError(msg)
+    return rec_pos, rec_typ, rec_len
+
+
+@njit(cache=True)
+def _scanrec(uf, pos):
+    """single pass over the record headers in the '2u4' low-word view
+
+    compiled by numba when available; returns the index arrays plus the
+    word position reached by the scan, to be validated by the caller
+    """
+
+    awr = uf.shape[1]
+    end = uf.shape[0] * awr
+    # upper bound: the shortest possible record is 2 words
+    cap = (end - pos) // 2 + 1
+    rec_pos = np.empty(cap, dtype=np.int64)
+    rec_typ = np.empty(cap, dtype=np.int64)
+    rec_len = np.empty(cap, dtype=np.int64)
+    n = 0
+    while pos < end - 1:
+        rlen = uf[pos // awr, pos % awr]
+        if rlen < 2:  # corrupt record, bail out
+            break
+        rec_pos[n] = pos
+        rec_typ[n] = uf[(pos + 1) // awr, (pos + 1) % awr]
+        rec_len[n] = rlen
+        n += 1
+        pos += rlen
+    return rec_pos[:n], rec_typ[:n], rec_len[:n], pos
+
+
 def walkr(data, start=0):
     """return iterator on abaqus records"""
 